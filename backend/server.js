@@ -1,3 +1,5 @@
+import cluster from 'node:cluster';
+import bytes from 'bytes';
 import express from 'express';
 import cors from 'cors';
 import dotenv from 'dotenv';
@@ -9,6 +11,9 @@ dotenv.config();
 // Initialize Express app
 const app = express();
 const PORT = process.env.PORT || 5000;
+const WORKERS = Number.parseInt(process.env.WEB_CONCURRENCY, 10) || 1;
+const BODY_LIMIT_SETTING = process.env.BODY_LIMIT || '100kb';
+const DB_TIMEOUT_SETTING = process.env.DB_TIMEOUT_MS || '15000';
 
 // Initialize Supabase client
 const supabaseUrl = process.env.SUPABASE_URL;
@@ -21,10 +26,29 @@ if (!supabaseUrl || !supabaseKey) {
 
 const supabase = createClient(supabaseUrl, supabaseKey);
 
+// Parse the body size limit once; an unparsable value would disable the check
+const BODY_LIMIT = /^\d+(\.\d+)?\s*(b|kb|mb|gb)?$/i.test(BODY_LIMIT_SETTING.trim())
+  ? bytes.parse(BODY_LIMIT_SETTING.trim())
+  : null;
+
+if (!BODY_LIMIT || BODY_LIMIT <= 0) {
+  console.error(`Invalid BODY_LIMIT "${BODY_LIMIT_SETTING}". Use a size such as 100kb or 1mb, or a byte count.`);
+  process.exit(1);
+}
+
+// AbortSignal.timeout throws on negative values and clamps ones past the timer
+// range (2^31 - 1 ms) to 1 ms, so reject both up front
+const DB_TIMEOUT_MS = Number(DB_TIMEOUT_SETTING);
+
+if (!Number.isInteger(DB_TIMEOUT_MS) || DB_TIMEOUT_MS <= 0 || DB_TIMEOUT_MS > 2 ** 31 - 1) {
+  console.error(`Invalid DB_TIMEOUT_MS "${DB_TIMEOUT_SETTING}". Use a positive number of milliseconds.`);
+  process.exit(1);
+}
+
 // Middleware
 app.use(cors());
-app.use(express.json());
-app.use(express.urlencoded({ extended: true }));
+app.use(express.json({ limit: BODY_LIMIT }));
+app.use(express.urlencoded({ extended: true, limit: BODY_LIMIT }));
 
 // Health check endpoint
 app.get('/api/health', (req, res) => {
@@ -33,11 +57,19 @@ app.get('/api/health', (req, res) => {
 
 // Test Supabase connection
 app.get('/api/test-db', async (req, res) => {
+  let signal;
+
   try {
+    signal = AbortSignal.timeout(DB_TIMEOUT_MS);
     const { data, error } = await supabase
       .from('events')
       .select('*')
-      .limit(1);
+      .limit(1)
+      .abortSignal(signal);
+
+    if (error && signal.aborted) {
+      return res.status(504).json({ error: 'Database request timed out' });
+    }
 
     if (error) {
       return res.status(500).json({ error: error.message });
@@ -45,6 +77,10 @@ app.get('/api/test-db', async (req, res) => {
 
     res.json({ message: 'Database connection successful', data });
   } catch (err) {
+    if (signal?.aborted) {
+      return res.status(504).json({ error: 'Database request timed out' });
+    }
+
     res.status(500).json({ error: err.message });
   }
 });
@@ -55,11 +91,54 @@ app.get('/api/test-db', async (req, res) => {
 
 // Error handling middleware
 app.use((err, req, res, next) => {
+  // Client errors from body-parser/http-errors (e.g. oversized or malformed
+  // payloads) are flagged as safe to expose; everything else stays a 500
+  if (err.expose && err.status >= 400 && err.status < 500) {
+    return res.status(err.status).json({ error: err.message });
+  }
+
   console.error(err.stack);
   res.status(500).json({ error: 'Internal server error' });
 });
 
-// Start server
-app.listen(PORT, () => {
-  console.log(`🚀 Server is running on http://localhost:${PORT}`);
-});
+// Start server (fork one worker per WEB_CONCURRENCY when set above 1)
+if (WORKERS > 1 && cluster.isPrimary) {
+  console.log(`🧩 Starting ${WORKERS} workers...`);
+  for (let i = 0; i < WORKERS; i++) {
+    cluster.fork();
+  }
+
+  // Give up instead of re-forking in a loop when workers keep crashing
+  const RESTART_WINDOW_MS = 60000;
+  const MAX_RESTARTS = WORKERS * 2;
+  const listening = new Set();
+  let restarts = [];
+
+  cluster.on('listening', (worker) => {
+    listening.add(worker.id);
+  });
+
+  cluster.on('exit', (worker, code, signal) => {
+    if (worker.exitedAfterDisconnect) return;
+
+    if (!listening.delete(worker.id)) {
+      console.error(`❌ Worker ${worker.process.pid} exited (${signal || code}) before listening, shutting down.`);
+      process.exit(1);
+    }
+
+    const now = Date.now();
+    restarts = restarts.filter((time) => now - time < RESTART_WINDOW_MS);
+    if (restarts.length >= MAX_RESTARTS) {
+      console.error(`❌ Workers crashed ${restarts.length + 1} times within ${RESTART_WINDOW_MS / 1000}s, shutting down.`);
+      process.exit(1);
+    }
+    restarts.push(now);
+
+    console.error(`Worker ${worker.process.pid} died (${signal || code}), restarting...`);
+    cluster.fork();
+  });
+} else {
+  app.listen(PORT, () => {
+    console.log(`🚀 Server is running on http://localhost:${PORT} (pid ${process.pid})`);
+  });
+}